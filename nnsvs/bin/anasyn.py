@@ -1,4 +1,7 @@
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from os.path import join
 from pathlib import Path
 
@@ -7,19 +10,206 @@ import numpy as np
 import pyworld
 import torch
 from hydra.utils import to_absolute_path
-from nnsvs.dsp import bandpass_filter
+from nnsvs.dsp import binarize_vuv, fill_and_clip_aperiodicity
 from nnsvs.gen import gen_world_params
 from nnsvs.logger import getLogger
 from nnsvs.multistream import get_static_stream_sizes, split_streams
+from nnsvs.svs import CUDAGraphVocoder, compile_vocoder, post_process
 from nnsvs.usfgan import USFGANWrapper
-from nnsvs.util import StandardScaler, init_seed, load_utt_list
+from nnsvs.util import (
+    PinnedBuffer,
+    StandardScaler,
+    inference_mode,
+    init_seed,
+    load_utt_list,
+    to_pytorch_standard_scaler,
+)
 from omegaconf import DictConfig, OmegaConf
 from parallel_wavegan.utils import load_model
 from scipy.io import wavfile
+from torch import nn
+from torch.cuda.amp import autocast
+from torch.utils import data as data_utils
 from tqdm.auto import tqdm
 
 
-@torch.no_grad()
+class AcousticFeatureDataset(data_utils.Dataset):  # type: ignore
+    """Dataset of acoustic features for analysis-by-synthesis
+
+    Args:
+        in_dir (str): directory of acoustic features
+        utt_ids (list): list of utterance IDs
+        transform (callable): function applied to the acoustic features
+    """
+
+    def __init__(self, in_dir, utt_ids, transform=None):
+        self.in_dir = in_dir
+        self.utt_ids = utt_ids
+        self.transform = transform
+
+    def __getitem__(self, idx):
+        """Get a pair of utterance ID and acoustic features
+
+        Args:
+            idx (int): index of the utterance
+
+        Returns:
+            tuple: utterance ID and acoustic features in numpy format
+        """
+        utt_id = self.utt_ids[idx]
+        # NOTE: memory-mapped features are read lazily from the page cache.
+        # Downstream functions must not modify them in-place.
+        feats = np.load(join(self.in_dir, f"{utt_id}-feats.npy"), mmap_mode="r")
+        if self.transform is not None:
+            feats = self.transform(feats)
+        return utt_id, feats
+
+    def __len__(self):
+        return len(self.utt_ids)
+
+
+def to_device(x, device, pinned_buffer=None):
+    """Move an array to the device in fp32
+
+    Args:
+        x (np.ndarray): input array
+        device (torch.device): target device
+        pinned_buffer (PinnedBuffer): pinned host buffer to stage the copy
+
+    Returns:
+        torch.Tensor: tensor on the device
+    """
+    if pinned_buffer is not None:
+        return pinned_buffer.to(x, device)
+    # NOTE: memory-mapped features are read-only, which torch.from_numpy warns about
+    return torch.from_numpy(np.array(x, dtype=np.float32)).to(device)
+
+
+def to_numpy(wav):
+    """Move generated waveforms to host memory
+
+    The waveforms are transferred in the dtype of the vocoder output (e.g., fp16)
+    and cast to fp32 on the host to reduce device-to-host traffic.
+
+    Args:
+        wav (torch.Tensor): generated waveforms
+
+    Returns:
+        np.ndarray: waveforms in fp32
+    """
+    return wav.cpu().numpy().astype(np.float32, copy=False)
+
+
+def gen_vocoder_input(
+    acoustic_features,
+    acoustic_config,
+    vuv_threshold=0.5,
+    feature_type="world",
+    static_stream_sizes=None,
+):
+    """Generate input features for PWG-style neural vocoders
+
+    NOTE: features are not normalized here. Normalization is done on the device.
+
+    Args:
+        acoustic_features (np.ndarray): acoustic features (T, D)
+        acoustic_config (dict): config of the acoustic model
+        vuv_threshold (float): threshold for V/UV
+        feature_type (str): ``world`` or ``melf0``
+        static_stream_sizes (list): precomputed static stream sizes
+
+    Returns:
+        np.ndarray: vocoder input features (T, C)
+    """
+    if static_stream_sizes is None:
+        static_stream_sizes = get_static_stream_sizes(
+            acoustic_config.stream_sizes,
+            acoustic_config.has_dynamic_features,
+            acoustic_config.num_windows,
+        )
+
+    if feature_type == "world":
+        mgc, lf0, vuv, bap = split_streams(acoustic_features, static_stream_sizes)
+        feats = [mgc, lf0, vuv, bap]
+        vuv_idx = mgc.shape[-1] + lf0.shape[-1]
+    elif feature_type == "melf0":
+        mel, lf0, vuv = split_streams(acoustic_features, [80, 1, 1])
+        feats = [mel, lf0, vuv]
+        vuv_idx = mel.shape[-1] + lf0.shape[-1]
+    else:
+        raise ValueError(f"Unknown feature type: {feature_type}")
+
+    voc_inp = np.concatenate(feats, axis=-1)
+    # NOTE: So far vocoder models are trained on binary V/UV features
+    binarize_vuv(vuv, vuv_threshold, voc_inp[:, vuv_idx : vuv_idx + 1])
+
+    return voc_inp
+
+
+def make_batches(lengths, batch_size):
+    """Group utterances of similar lengths into mini-batches
+
+    Args:
+        lengths (list): number of frames of each utterance
+        batch_size (int): maximum number of utterances in a mini-batch
+
+    Returns:
+        list: list of mini-batches of utterance indices
+    """
+    # NOTE: stable sort to keep the order of utterances of the same length
+    indices = np.argsort(lengths, kind="mergesort").tolist()
+
+    return [
+        indices[idx : idx + batch_size] for idx in range(0, len(indices), batch_size)
+    ]
+
+
+@inference_mode()
+def batch_inference(vocoder, voc_inps):
+    """Run PWG-style vocoder inference on a mini-batch of utterances
+
+    Inputs are padded to the longest utterance in the mini-batch by repeating
+    their last frames, and outputs are trimmed back to the original lengths.
+
+    Args:
+        vocoder (nn.Module): generator of the neural vocoder
+        voc_inps (list): list of vocoder input features (T, C)
+
+    Returns:
+        list: list of generated waveforms
+    """
+    lengths = [len(c) for c in voc_inps]
+    max_len = max(lengths)
+    # NOTE: repeat the last frames rather than zero-padding so that the frames
+    # near the end are conditioned the same as in per-utterance inference
+    c = torch.stack(
+        [torch.cat([c, c[-1:].expand(max_len - len(c), -1)]) for c in voc_inps]
+    )
+    # (B, T, C) -> (B, C, T)
+    c = c.transpose(1, 2)
+    with autocast(enabled=c.dtype == torch.float16):
+        if hasattr(vocoder, "aux_context_window"):
+            # NOTE: ParallelWaveGAN takes noise as input in addition to
+            # auxiliary features padded by the context window
+            c = nn.ReplicationPad1d(vocoder.aux_context_window)(c)
+            x = torch.randn(
+                len(voc_inps),
+                1,
+                max_len * vocoder.upsample_factor,
+                device=c.device,
+                dtype=c.dtype,
+            )
+            wavs = vocoder(x=x, c=c)
+        else:
+            wavs = vocoder(c=c)
+    # NOTE: a single device-to-host copy for the whole mini-batch
+    wavs = to_numpy(wavs.view(len(voc_inps), -1))
+    hop_size = wavs.shape[-1] // max_len
+
+    return [wav[: length * hop_size] for wav, length in zip(wavs, lengths)]
+
+
+@inference_mode()
 def anasyn(
     device,
     acoustic_features,
@@ -33,16 +223,22 @@ def anasyn(
     use_world_codec=True,
     feature_type="world",
     vocoder_type="world",
+    pinned_buffer=None,
+    static_stream_sizes=None,
 ):
-    static_stream_sizes = get_static_stream_sizes(
-        acoustic_config.stream_sizes,
-        acoustic_config.has_dynamic_features,
-        acoustic_config.num_windows,
-    )
+    if static_stream_sizes is None:
+        static_stream_sizes = get_static_stream_sizes(
+            acoustic_config.stream_sizes,
+            acoustic_config.has_dynamic_features,
+            acoustic_config.num_windows,
+        )
 
     # Split multi-stream features
     streams = split_streams(acoustic_features, static_stream_sizes)
 
+    # NOTE: vocoder may be converted to half precision for faster inference
+    dtype = next(vocoder.parameters()).dtype if vocoder is not None else torch.float32
+
     # Generate WORLD parameters
     if feature_type == "world":
         assert len(streams) == 4
@@ -71,81 +267,63 @@ def anasyn(
             frame_period,
         )
     elif vocoder_type == "pwg":
-        # NOTE: So far vocoder models are trained on binary V/UV features
-        vuv = (vuv > vuv_threshold).astype(np.float32)
-        if feature_type == "world":
-            voc_inp = (
-                torch.from_numpy(
-                    vocoder_in_scaler.transform(
-                        np.concatenate([mgc, lf0, vuv, bap], axis=-1)
-                    )
-                )
-                .float()
-                .to(device)
-            )
-        elif feature_type == "melf0":
-            voc_inp = (
-                torch.from_numpy(
-                    vocoder_in_scaler.transform(
-                        np.concatenate([mel, lf0, vuv], axis=-1)
-                    )
-                )
-                .float()
-                .to(device)
-            )
-        wav = vocoder.inference(voc_inp).view(-1).to("cpu").numpy()
+        voc_inp = gen_vocoder_input(
+            acoustic_features,
+            acoustic_config,
+            vuv_threshold=vuv_threshold,
+            feature_type=feature_type,
+            static_stream_sizes=static_stream_sizes,
+        )
+        voc_inp = vocoder_in_scaler.transform(
+            to_device(voc_inp, device, pinned_buffer)
+        ).to(dtype)
+        with autocast(enabled=dtype == torch.float16):
+            wav = vocoder.inference(voc_inp)
+        wav = to_numpy(wav.view(-1))
     elif vocoder_type == "usfgan":
         if feature_type == "world":
             fftlen = pyworld.get_cheaptrick_fft_size(sample_rate)
             aperiodicity = pyworld.decode_aperiodicity(
-                np.ascontiguousarray(bap).astype(np.float64), sample_rate, fftlen
-            )
-            # fill aperiodicity with ones for unvoiced regions
-            aperiodicity[vuv.reshape(-1) < vuv_threshold, 0] = 1.0
-            # WORLD fails catastrophically for out of range aperiodicity
-            aperiodicity = np.clip(aperiodicity, 0.0, 1.0)
-            # back to bap
-            bap = pyworld.code_aperiodicity(aperiodicity, sample_rate).astype(
-                np.float32
+                np.ascontiguousarray(bap, dtype=np.float64), sample_rate, fftlen
             )
+            # fill aperiodicity with ones for unvoiced regions and clip it to [0, 1]
+            fill_and_clip_aperiodicity(aperiodicity, vuv, vuv_threshold)
 
-            aux_feats = (
-                torch.from_numpy(
-                    vocoder_in_scaler.transform(np.concatenate([mgc, bap], axis=-1))
-                )
-                .float()
-                .to(device)
+            # NOTE: write mgc and the re-coded bap into a single fp32 buffer
+            mgc_dim = mgc.shape[-1]
+            aux_feats = np.empty((len(mgc), mgc_dim + bap.shape[-1]), dtype=np.float32)
+            aux_feats[:, :mgc_dim] = mgc
+            # back to bap
+            aux_feats[:, mgc_dim:] = pyworld.code_aperiodicity(
+                aperiodicity, sample_rate
             )
         elif feature_type == "melf0":
             # NOTE: So far vocoder models are trained on binary V/UV features
-            vuv = (vuv > vuv_threshold).astype(np.float32)
-            aux_feats = (
-                torch.from_numpy(vocoder_in_scaler.transform(mel)).float().to(device)
-            )
-        contf0 = np.exp(lf0)
-        if vocoder_config.data.sine_f0_type == "contf0":
-            f0_inp = contf0
-        elif vocoder_config.data.sine_f0_type == "f0":
-            f0_inp = contf0
-            f0_inp[vuv < vuv_threshold] = 0
-        wav = vocoder.inference(f0_inp, aux_feats).view(-1).to("cpu").numpy()
+            vuv = binarize_vuv(vuv, vuv_threshold, np.empty_like(vuv))
+            aux_feats = mel
+        aux_feats = vocoder_in_scaler.transform(
+            to_device(aux_feats, device, pinned_buffer)
+        ).to(dtype)
+        f0_inp = to_device(lf0, device).exp()
+        if vocoder_config.data.sine_f0_type == "f0":
+            f0_inp.masked_fill_(to_device(vuv, device) < vuv_threshold, 0.0)
+        with autocast(enabled=dtype == torch.float16):
+            wav = vocoder.inference(f0_inp, aux_feats)
+        wav = to_numpy(wav.view(-1))
 
     return wav
 
 
-def post_process(wav, sample_rate):
-    wav = bandpass_filter(wav, sample_rate)
+def save_wav(out_wav_path, wav, sample_rate):
+    """Post-process a waveform and write it to a file
 
-    if np.max(wav) > 10:
-        if np.abs(wav).max() > 32767:
-            wav = wav / np.abs(wav).max()
-        # data is likely already in [-32768, 32767]
-        wav = wav.astype(np.int16)
-    else:
-        if np.abs(wav).max() > 1.0:
-            wav = wav / np.abs(wav).max()
-        wav = (wav * 32767.0).astype(np.int16)
-    return wav
+    Args:
+        out_wav_path (str): path to the output wav file
+        wav (np.ndarray): waveform
+        sample_rate (int): sampling rate
+    """
+    # NOTE: post_process returns 16-bit integers
+    wavfile.write(out_wav_path, rate=sample_rate, data=post_process(wav, sample_rate))
 
 
 @hydra.main(config_path="conf/synthesis", config_name="config")
@@ -160,6 +338,11 @@ def my_app(config: DictConfig) -> None:
         device = torch.device(config.device)
 
     acoustic_config = OmegaConf.load(to_absolute_path(config.acoustic.model_yaml))
+    static_stream_sizes = get_static_stream_sizes(
+        acoustic_config.stream_sizes,
+        acoustic_config.has_dynamic_features,
+        acoustic_config.num_windows,
+    )
 
     # Vocoder
     if config.vocoder.checkpoint is not None and len(config.vocoder.checkpoint) > 0:
@@ -191,11 +374,7 @@ def my_app(config: DictConfig) -> None:
                 mean_ = np.load(vocoder_dir / "in_vocoder_scaler_mean.npy")
                 var_ = np.load(vocoder_dir / "in_vocoder_scaler_var.npy")
                 scale_ = np.load(vocoder_dir / "in_vocoder_scaler_scale.npy")
-                stream_sizes = get_static_stream_sizes(
-                    acoustic_config.stream_sizes,
-                    acoustic_config.has_dynamic_features,
-                    acoustic_config.num_windows,
-                )
+                stream_sizes = static_stream_sizes
                 mgc_end_dim = stream_sizes[0]
                 bap_start_dim = sum(stream_sizes[:3])
                 bap_end_dim = sum(stream_sizes[:4])
@@ -227,7 +406,25 @@ def my_app(config: DictConfig) -> None:
             )
 
         vocoder.eval()
+        if device.type == "cuda" and config.vocoder.get("fp16", False):
+            vocoder = vocoder.half()
+        compile_backend = config.vocoder.get("compile_backend", None)
+        if compile_backend:
+            vocoder = compile_vocoder(vocoder, compile_backend)
+        if (
+            config.vocoder.get("cuda_graph", False)
+            and device.type == "cuda"
+            and config.synthesis.vocoder_type == "pwg"
+            and config.synthesis.get("batch_size", 1) == 1
+        ):
+            vocoder = CUDAGraphVocoder(vocoder)
+        vocoder_dtype = next(vocoder.parameters()).dtype
+        # NOTE: normalize vocoder inputs on the device in fp32 and cast afterwards
+        vocoder_in_scaler = to_pytorch_standard_scaler(vocoder_in_scaler).to(device)
+        # NOTE: reuse a page-locked buffer for faster host-to-device copies
+        pinned_buffer = PinnedBuffer() if device.type == "cuda" else None
     else:
+        pinned_buffer = None
         vocoder = None
         vocoder_config = None
         vocoder_in_scaler = None
@@ -243,29 +440,88 @@ def my_app(config: DictConfig) -> None:
     os.makedirs(out_dir, exist_ok=True)
     utt_ids = load_utt_list(to_absolute_path(config.utt_list))
     logger.info("Processes %s utterances...", len(utt_ids))
-    for utt_id in tqdm(utt_ids):
-        acoustic_features = np.load(join(in_dir, f"{utt_id}-feats.npy"))
-        init_seed(1234)
 
-        wav = anasyn(
-            device=device,
-            acoustic_features=acoustic_features,
+    # NOTE: resolve config values once rather than on every utterance
+    sample_rate = config.synthesis.sample_rate
+    # NOTE: configs written before batching was supported lack the key
+    batch_size = config.synthesis.get("batch_size", 1)
+    if config.synthesis.vocoder_type == "pwg" and batch_size > 1:
+        # NOTE: vocoder inputs are computed by data loader workers
+        transform = partial(
+            gen_vocoder_input,
             acoustic_config=acoustic_config,
-            vocoder=vocoder,
-            vocoder_config=vocoder_config,
-            vocoder_in_scaler=vocoder_in_scaler,
-            sample_rate=config.synthesis.sample_rate,
-            frame_period=config.synthesis.frame_period,
-            use_world_codec=config.synthesis.use_world_codec,
-            feature_type=config.synthesis.feature_type,
-            vocoder_type=config.synthesis.vocoder_type,
             vuv_threshold=config.synthesis.vuv_threshold,
+            feature_type=config.synthesis.feature_type,
+            static_stream_sizes=static_stream_sizes,
         )
-        wav = post_process(wav, config.synthesis.sample_rate)
-        out_wav_path = join(out_dir, f"{utt_id}.wav")
-        wavfile.write(
-            out_wav_path, rate=config.synthesis.sample_rate, data=wav.astype(np.int16)
-        )
+        # Sort utterances by length to minimize padding in each mini-batch
+        lengths = [
+            np.load(join(in_dir, f"{utt_id}-feats.npy"), mmap_mode="r").shape[0]
+            for utt_id in utt_ids
+        ]
+        batches = make_batches(lengths, batch_size)
+    else:
+        transform = None
+        batches = [[idx] for idx in range(len(utt_ids))]
+    synthesize = partial(
+        anasyn,
+        device=device,
+        acoustic_config=acoustic_config,
+        vocoder=vocoder,
+        vocoder_config=vocoder_config,
+        vocoder_in_scaler=vocoder_in_scaler,
+        sample_rate=sample_rate,
+        frame_period=config.synthesis.frame_period,
+        use_world_codec=config.synthesis.use_world_codec,
+        feature_type=config.synthesis.feature_type,
+        vocoder_type=config.synthesis.vocoder_type,
+        vuv_threshold=config.synthesis.vuv_threshold,
+        pinned_buffer=pinned_buffer,
+        static_stream_sizes=static_stream_sizes,
+    )
+
+    # NOTE: overlap feature loading with synthesis
+    num_workers = config.synthesis.get("num_workers", 0)
+    data_loader = data_utils.DataLoader(
+        AcousticFeatureDataset(in_dir, utt_ids, transform=transform),
+        batch_sampler=batches,
+        collate_fn=list,
+        num_workers=num_workers,
+        **({"prefetch_factor": 4} if num_workers > 0 else {}),
+    )
+    # NOTE: post-processing and writing are done in background threads
+    # so that they overlap with synthesis of the next mini-batch
+    max_workers = 2
+    futures = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in tqdm(data_loader):
+            init_seed(1234)
+            if transform is not None:
+                voc_inps = [
+                    vocoder_in_scaler.transform(
+                        to_device(voc_inp, device, pinned_buffer)
+                    ).to(vocoder_dtype)
+                    for _, voc_inp in batch
+                ]
+                wavs = batch_inference(vocoder, voc_inps)
+            else:
+                wavs = [
+                    synthesize(acoustic_features=acoustic_features)
+                    for _, acoustic_features in batch
+                ]
+
+            for (utt_id, _), wav in zip(batch, wavs):
+                out_wav_path = join(out_dir, f"{utt_id}.wav")
+                futures.append(
+                    executor.submit(save_wav, out_wav_path, wav, sample_rate)
+                )
+                # NOTE: bound the number of pending waveforms in memory. This also
+                # re-raises exceptions of the background threads promptly
+                while len(futures) > 2 * max_workers:
+                    futures.popleft().result()
+    # Propagate exceptions raised in the background threads
+    for future in futures:
+        future.result()
 
 
 def entry():
@@ -12,7 +12,12 @@ from nnsvs.logger import getLogger
 from nnsvs.multistream import get_static_features, get_static_stream_sizes
 from nnsvs.svs import post_process, predict_timings, synthesis_from_timings
 from nnsvs.usfgan import USFGANWrapper
-from nnsvs.util import StandardScaler, init_seed, load_utt_list
+from nnsvs.util import (
+    StandardScaler,
+    init_seed,
+    load_utt_list,
+    to_pytorch_standard_scaler,
+)
 from omegaconf import DictConfig, OmegaConf
 from parallel_wavegan.utils import load_model
 from scipy.io import wavfile
@@ -163,6 +168,8 @@ def my_app(config: DictConfig) -> None:
             )
 
         vocoder.eval()
+        # NOTE: keep a device copy of the scaler to normalize on the device
+        vocoder_in_scaler = to_pytorch_standard_scaler(vocoder_in_scaler).to(device)
     else:
         vocoder = None
         vocoder_config = None
@@ -1,4 +1,8 @@
+from functools import lru_cache
+
+import numpy as np
 import torch
+from numba import njit
 from scipy import signal
 from torch import nn
 from torch.nn import functional as F
@@ -33,6 +37,99 @@ def lowpass_filter(x, fs, cutoff=5, N=5):
     return y
 
 
+@njit(fastmath=True, cache=True, nogil=True)
+def scale_to_int16(x, scale):
+    """Scale a signal and convert it to 16-bit integers in a single pass
+
+    Values are truncated towards zero as in ``(x * scale).astype(np.int16)``.
+
+    Args:
+        x (np.ndarray): input signal
+        scale (float): scale factor
+
+    Returns:
+        np.ndarray: scaled signal in int16
+    """
+    y = np.empty(x.shape[0], dtype=np.int16)
+    for i in range(x.shape[0]):
+        y[i] = np.int16(x[i] * scale)
+    return y
+
+
+@njit(cache=True, nogil=True)
+def peak_amplitude(x):
+    """Compute the maximum and the absolute maximum of a signal in a single pass
+
+    Args:
+        x (np.ndarray): input signal
+
+    Returns:
+        tuple: maximum and absolute maximum of the signal
+    """
+    max_value = -np.inf
+    abs_max_value = 0.0
+    for i in range(x.shape[0]):
+        v = x[i]
+        if v > max_value:
+            max_value = v
+        if abs(v) > abs_max_value:
+            abs_max_value = abs(v)
+    return max_value, abs_max_value
+
+
+@njit(cache=True, nogil=True)
+def binarize_vuv(vuv, threshold, out):
+    """Binarize V/UV flags in a single pass
+
+    ``out`` may be a view of a larger array (e.g., a column of vocoder inputs) or
+    ``vuv`` itself for in-place binarization.
+
+    Args:
+        vuv (np.ndarray): V/UV flags (T, 1)
+        threshold (float): threshold for V/UV
+        out (np.ndarray): output array (T, 1)
+
+    Returns:
+        np.ndarray: binary V/UV flags
+    """
+    for i in range(vuv.shape[0]):
+        out[i, 0] = 1.0 if vuv[i, 0] > threshold else 0.0
+    return out
+
+
+@njit(cache=True, nogil=True)
+def fill_and_clip_aperiodicity(aperiodicity, vuv, threshold):
+    """Fill aperiodicity with ones for unvoiced frames and clip it to [0, 1]
+
+    The first frequency bin of unvoiced frames is set to one as in WORLD.
+    The input is modified in-place.
+
+    Args:
+        aperiodicity (np.ndarray): aperiodicity (T, D)
+        vuv (np.ndarray): V/UV flags (T, 1)
+        threshold (float): threshold for V/UV
+
+    Returns:
+        np.ndarray: aperiodicity
+    """
+    for i in range(aperiodicity.shape[0]):
+        if vuv[i, 0] < threshold:
+            aperiodicity[i, 0] = 1.0
+        for j in range(aperiodicity.shape[1]):
+            # NOTE: WORLD fails catastrophically for out of range aperiodicity
+            aperiodicity[i, j] = min(max(aperiodicity[i, j], 0.0), 1.0)
+    return aperiodicity
+
+
+@lru_cache(maxsize=8)
+def _design_bandpass_filter(sr, cutoff, N=5):
+    nyquist = sr // 2
+    norm_cutoff = cutoff / nyquist
+    Wn = [norm_cutoff, 0.999]
+
+    return signal.butter(N, Wn, "bandpass", output="sos")
+
+
 def bandpass_filter(x, sr, cutoff=70):
     """Band-pass filter
 
@@ -44,12 +141,10 @@ def bandpass_filter(x, sr, cutoff=70):
     Returns:
         np.ndarray: filtered signal
     """
-    nyquist = sr // 2
-    norm_cutoff = cutoff / nyquist
-    Wn = [norm_cutoff, 0.999]
-
-    b, a = signal.butter(5, Wn, "bandpass")
-    y = signal.filtfilt(b, a, x)
+    # NOTE: the filter is designed once per (sr, cutoff) and applied in
+    # second-order sections for numerical stability
+    sos = _design_bandpass_filter(sr, cutoff)
+    y = signal.sosfiltfilt(sos, x)
 
     return y
 
@@ -7,6 +7,7 @@ from nnmnkwii.frontend import merlin as fe
 from nnmnkwii.io import hts
 from nnmnkwii.preprocessing.f0 import interp1d
 from nnsvs.base import PredictionType
+from nnsvs.dsp import fill_and_clip_aperiodicity
 from nnsvs.io.hts import get_note_indices
 from nnsvs.multistream import (
     get_static_stream_sizes,
@@ -728,20 +729,18 @@ def gen_world_params(
     alpha = pysptk.util.mcepalpha(sample_rate)
     if use_world_codec:
         spectrogram = pyworld.decode_spectral_envelope(
-            np.ascontiguousarray(mgc).astype(np.float64), sample_rate, fftlen
+            np.ascontiguousarray(mgc, dtype=np.float64), sample_rate, fftlen
         )
     else:
         spectrogram = pysptk.mc2sp(
             np.ascontiguousarray(mgc), fftlen=fftlen, alpha=alpha
         )
     aperiodicity = pyworld.decode_aperiodicity(
-        np.ascontiguousarray(bap).astype(np.float64), sample_rate, fftlen
+        np.ascontiguousarray(bap, dtype=np.float64), sample_rate, fftlen
     )
 
-    # fill aperiodicity with ones for unvoiced regions
-    aperiodicity[vuv.reshape(-1) < vuv_threshold, 0] = 1.0
-    # WORLD fails catastrophically for out of range aperiodicity
-    aperiodicity = np.clip(aperiodicity, 0.0, 1.0)
+    # fill aperiodicity with ones for unvoiced regions and clip it to [0, 1]
+    fill_and_clip_aperiodicity(aperiodicity, vuv.reshape(len(vuv), -1), vuv_threshold)
 
     f0 = lf0.copy()
     f0[np.nonzero(f0)] = np.exp(f0[np.nonzero(f0)])
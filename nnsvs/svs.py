@@ -1,3 +1,4 @@
+import inspect
 import json
 from pathlib import Path
 from warnings import warn
@@ -11,7 +12,13 @@ from hydra.utils import instantiate
 from nnmnkwii.frontend import merlin as fe
 from nnmnkwii.io import hts
 from nnmnkwii.postfilters import merlin_post_filter
-from nnsvs.dsp import bandpass_filter
+from nnsvs.dsp import (
+    bandpass_filter,
+    binarize_vuv,
+    fill_and_clip_aperiodicity,
+    peak_amplitude,
+    scale_to_int16,
+)
 from nnsvs.gen import (
     gen_spsvs_static_features,
     gen_world_params,
@@ -29,8 +36,14 @@ from nnsvs.multistream import (
 from nnsvs.pitch import lowpass_filter
 from nnsvs.postfilters import variance_scaling
 from nnsvs.usfgan import USFGANWrapper
-from nnsvs.util import MinMaxScaler, StandardScaler
+from nnsvs.util import (
+    MinMaxScaler,
+    StandardScaler,
+    inference_mode,
+    to_pytorch_standard_scaler,
+)
 from omegaconf import OmegaConf
+from torch import nn
 
 try:
     from parallel_wavegan.utils import load_model
@@ -39,6 +52,12 @@ try:
 except ImportError:
     _pwg_available = False
 
+# NOTE: memory-mapped checkpoints require PyTorch 2.1 or later
+_mmap_load_available = (
+    "mmap" in inspect.signature(torch.load).parameters
+    and "assign" in inspect.signature(nn.Module.load_state_dict).parameters
+)
+
 
 def extract_static_scaler(out_scaler, model_config):
     mean_ = get_static_features(
@@ -66,7 +85,132 @@ def extract_static_scaler(out_scaler, model_config):
     return static_scaler
 
 
-@torch.no_grad()
+def compile_vocoder(vocoder, backend="jit"):
+    """Compile the generator of a neural vocoder to reduce per-call overhead
+
+    The forward method of the generator is replaced with the compiled one so that
+    ``vocoder.inference`` can be used as before. Parameters are shared with the
+    original module. If TorchScript compilation fails, the vocoder is left in
+    eager mode.
+
+    Args:
+        vocoder (nn.Module): PWG-style generator or USFGANWrapper
+        backend (str): ``jit`` for TorchScript or ``inductor`` for ``torch.compile``
+
+    Returns:
+        nn.Module: vocoder
+    """
+    generator = vocoder.generator if isinstance(vocoder, USFGANWrapper) else vocoder
+    if backend == "jit":
+        try:
+            generator.forward = torch.jit.script(generator).forward
+        except Exception as e:
+            warn(f"Failed to compile the vocoder with TorchScript: {e}")
+    elif backend == "inductor":
+        if not hasattr(torch, "compile"):
+            warn("torch.compile requires PyTorch 2.0 or later. Skip compilation.")
+        else:
+            generator.forward = torch.compile(generator.forward, mode="reduce-overhead")
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    return vocoder
+
+
+class CUDAGraphVocoder(nn.Module):
+    """Run a PWG-style vocoder by replaying captured CUDA graphs
+
+    Input lengths are rounded up to a multiple of ``bucket_size`` frames by
+    repeating the last frame. A CUDA graph is captured once per bucket and replayed
+    for all inputs that fall into it, which removes per-kernel launch overhead.
+
+    Args:
+        vocoder (nn.Module): PWG-style generator on a CUDA device
+        bucket_size (int): granularity of the input lengths in frames
+        num_warmup (int): number of warm-up runs before capturing a graph
+    """
+
+    def __init__(self, vocoder, bucket_size=512, num_warmup=3):
+        super().__init__()
+        self.vocoder = vocoder
+        self.bucket_size = bucket_size
+        self.num_warmup = num_warmup
+        self._graphs = {}
+        self._pool = None
+
+    def _forward(self, static_in, static_noise):
+        # NOTE: call the generator directly instead of ``inference``, which draws
+        # the input noise on the CPU and cannot be captured in a graph
+        c = static_in.transpose(1, 0).unsqueeze(0)
+        if static_noise is None:
+            return self.vocoder(c=c)
+        c = nn.ReplicationPad1d(self.vocoder.aux_context_window)(c)
+        static_noise.normal_()
+        return self.vocoder(x=static_noise, c=c)
+
+    def _capture(self, static_in, static_noise):
+        device = static_in.device
+        # NOTE: streams, graphs and memory pools are bound to the current device.
+        # Autocast must not cache casted weights across graph captures
+        with torch.cuda.device(device), torch.cuda.amp.autocast(
+            enabled=torch.is_autocast_enabled(), cache_enabled=False
+        ):
+            stream = torch.cuda.Stream(device=device)
+            stream.wait_stream(torch.cuda.current_stream(device))
+            with torch.cuda.stream(stream):
+                for _ in range(self.num_warmup):
+                    self._forward(static_in, static_noise)
+            torch.cuda.current_stream(device).wait_stream(stream)
+
+            if self._pool is None:
+                self._pool = torch.cuda.graph_pool_handle()
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph, pool=self._pool):
+                static_out = self._forward(static_in, static_noise)
+
+        return graph, static_out.view(-1, 1)
+
+    def inference(self, c):
+        """Inference with CUDA graphs
+
+        Args:
+            c (torch.Tensor): auxiliary features (T, C)
+
+        Returns:
+            torch.Tensor: waveform (T * hop_size, 1)
+        """
+        T = c.shape[0]
+        max_len = -(-T // self.bucket_size) * self.bucket_size
+        if max_len not in self._graphs:
+            static_in = c.new_empty(max_len, c.shape[-1])
+            static_in[:T].copy_(c)
+            static_in[T:].copy_(c[-1:].expand(max_len - T, -1))
+            if hasattr(self.vocoder, "aux_context_window"):
+                static_noise = c.new_empty(1, 1, max_len * self.vocoder.upsample_factor)
+            else:
+                static_noise = None
+            # NOTE: keep references to all the static buffers; the graph only holds
+            # raw pointers, so freed buffers would be reused by other tensors
+            self._graphs[max_len] = (
+                static_in,
+                static_noise,
+                *self._capture(static_in, static_noise),
+            )
+        static_in, _, graph, static_out = self._graphs[max_len]
+
+        static_in[:T].copy_(c)
+        static_in[T:].copy_(c[-1:].expand(max_len - T, -1))
+        with torch.cuda.device(c.device):
+            graph.replay()
+        hop_size = static_out.shape[0] // max_len
+
+        return static_out[: T * hop_size].clone()
+
+    def remove_weight_norm(self):
+        self.vocoder.remove_weight_norm()
+
+
+@inference_mode()
 def predict_timings(
     device,
     labels,
@@ -130,7 +274,7 @@ def predict_timings(
     return duration_modified_labels
 
 
-@torch.no_grad()
+@inference_mode()
 def synthesis_from_timings(
     device,
     duration_modified_labels,
@@ -165,6 +309,7 @@ def synthesis_from_timings(
     post_f0_shift_in_cent=0,
     vibrato_scale=1.0,
     force_fix_vuv=False,
+    static_stream_sizes=None,
 ):
     hts_frame_shift = int(frame_period * 1e4)
     pitch_idx = get_pitch_index(binary_dict, numeric_dict)
@@ -187,11 +332,12 @@ def synthesis_from_timings(
         f0_shift_in_cent=pre_f0_shift_in_cent,
     )
 
-    static_stream_sizes = get_static_stream_sizes(
-        acoustic_config.stream_sizes,
-        acoustic_config.has_dynamic_features,
-        acoustic_config.num_windows,
-    )
+    if static_stream_sizes is None:
+        static_stream_sizes = get_static_stream_sizes(
+            acoustic_config.stream_sizes,
+            acoustic_config.has_dynamic_features,
+            acoustic_config.num_windows,
+        )
 
     if post_filter_type == "gv" or (
         post_filter_type == "nnsvs" and feature_type == "world"
@@ -339,63 +485,52 @@ def synthesis_from_timings(
             frame_period,
         )
     elif vocoder_type == "pwg":
-        # NOTE: So far vocoder models are trained on binary V/UV features
-        vuv = (vuv > vuv_threshold).astype(np.float32)
+        # NOTE: normalization is done on the device
+        vocoder_in_scaler = to_pytorch_standard_scaler(vocoder_in_scaler).to(device)
         if feature_type == "world":
-            voc_inp = (
-                torch.from_numpy(
-                    vocoder_in_scaler.transform(
-                        np.concatenate([mgc, lf0, vuv, bap], axis=-1)
-                    )
-                )
-                .float()
-                .to(device)
-            )
+            voc_inp = np.concatenate([mgc, lf0, vuv, bap], axis=-1)
+            vuv_idx = mgc.shape[-1] + lf0.shape[-1]
         elif feature_type == "melf0":
-            voc_inp = (
-                torch.from_numpy(
-                    vocoder_in_scaler.transform(
-                        np.concatenate([mel, lf0, vuv], axis=-1)
-                    )
-                )
-                .float()
-                .to(device)
-            )
+            voc_inp = np.concatenate([mel, lf0, vuv], axis=-1)
+            vuv_idx = mel.shape[-1] + lf0.shape[-1]
+        # NOTE: So far vocoder models are trained on binary V/UV features
+        vuv = binarize_vuv(vuv, vuv_threshold, voc_inp[:, vuv_idx : vuv_idx + 1])
+        voc_inp = vocoder_in_scaler.transform(
+            torch.from_numpy(voc_inp).float().to(device)
+        )
         wav = vocoder.inference(voc_inp).view(-1).to("cpu").numpy()
     elif vocoder_type == "usfgan":
         if feature_type == "world":
             fftlen = pyworld.get_cheaptrick_fft_size(sample_rate)
             aperiodicity = pyworld.decode_aperiodicity(
-                np.ascontiguousarray(bap).astype(np.float64),
+                np.ascontiguousarray(bap, dtype=np.float64),
                 sample_rate,
                 fftlen,
             )
-            # fill aperiodicity with ones for unvoiced regions
-            aperiodicity[vuv.reshape(-1) < vuv_threshold, 0] = 1.0
-            # WORLD fails catastrophically for out of range aperiodicity
-            aperiodicity = np.clip(aperiodicity, 0.0, 1.0)
+            # fill aperiodicity with ones for unvoiced regions and clip it to [0, 1]
+            fill_and_clip_aperiodicity(aperiodicity, vuv, vuv_threshold)
+
+            # NOTE: write mgc and the re-coded bap into a single fp32 buffer
+            mgc_dim = mgc.shape[-1]
+            aux_feats = np.empty((len(mgc), mgc_dim + bap.shape[-1]), dtype=np.float32)
+            aux_feats[:, :mgc_dim] = mgc
             # back to bap
-            bap = pyworld.code_aperiodicity(aperiodicity, sample_rate).astype(
-                np.float32
+            aux_feats[:, mgc_dim:] = pyworld.code_aperiodicity(
+                aperiodicity, sample_rate
             )
-            aux_feats = [mgc, bap]
+            bap = aux_feats[:, mgc_dim:]
         elif feature_type == "melf0":
-            aux_feats = [mel]
+            # NOTE: raw mel is copied as is and normalized on the device
+            aux_feats = mel
 
-        aux_feats = (
-            torch.from_numpy(
-                vocoder_in_scaler.transform(np.concatenate(aux_feats, axis=-1))
-            )
-            .float()
-            .to(device)
+        vocoder_in_scaler = to_pytorch_standard_scaler(vocoder_in_scaler).to(device)
+        aux_feats = vocoder_in_scaler.transform(
+            torch.from_numpy(aux_feats).float().to(device)
         )
 
-        contf0 = np.exp(lf0)
-        if vocoder_config.data.sine_f0_type == "contf0":
-            f0_inp = contf0
-        elif vocoder_config.data.sine_f0_type == "f0":
-            f0_inp = contf0
-            f0_inp[vuv < vuv_threshold] = 0
+        f0_inp = torch.from_numpy(lf0).float().to(device).exp()
+        if vocoder_config.data.sine_f0_type == "f0":
+            f0_inp.masked_fill_(torch.from_numpy(vuv).to(device) < vuv_threshold, 0.0)
         wav = vocoder.inference(f0_inp, aux_feats).view(-1).to("cpu").numpy()
 
     if feature_type == "world":
@@ -425,16 +560,69 @@ def synthesis_from_timings(
 def post_process(wav, sample_rate):
     wav = bandpass_filter(wav, sample_rate)
 
-    if np.max(wav) > 10:
-        if np.abs(wav).max() > 32767:
-            wav = wav / np.abs(wav).max()
+    max_value, peak = peak_amplitude(wav)
+    if max_value > 10:
         # data is likely already in [-32768, 32767]
-        wav = wav.astype(np.int16)
+        scale = 1.0 / peak if peak > 32767 else 1.0
     else:
-        if np.abs(wav).max() > 1.0:
-            wav = wav / np.abs(wav).max()
-        wav = (wav * 32767.0).astype(np.int16)
-    return wav
+        scale = 32767.0 / peak if peak > 1.0 else 32767.0
+    return scale_to_int16(wav, scale)
+
+
+def _load_state_dict(model, path):
+    """Load a state dict from a checkpoint into a model
+
+    If supported by PyTorch (2.1 or later), the checkpoint is memory-mapped and its
+    tensors are assigned to the model as is to avoid extra copies of the weights.
+
+    Args:
+        model (nn.Module): model on CPU
+        path (Path): path to the checkpoint
+    """
+    if _mmap_load_available:
+        try:
+            checkpoint = torch.load(path, map_location="cpu", mmap=True)
+        except RuntimeError:
+            # NOTE: checkpoints saved in the legacy format cannot be memory-mapped
+            checkpoint = None
+        if checkpoint is not None:
+            model.load_state_dict(checkpoint["state_dict"], assign=True)
+            return
+    checkpoint = torch.load(path, map_location="cpu")
+    model.load_state_dict(checkpoint["state_dict"])
+
+
+def _load_model(model_dir, name, device):
+    """Load a model and its config from a packed model directory
+
+    Args:
+        model_dir (Path): model directory
+        name (str): model name (e.g., ``acoustic``)
+        device (str): cpu or cuda
+
+    Returns:
+        tuple: model in eval mode and its config
+    """
+    config = OmegaConf.load(model_dir / f"{name}_model.yaml")
+    model = instantiate(config.netG)
+    _load_state_dict(model, model_dir / f"{name}_model.pth")
+    model = model.to(device).eval()
+    return model, config
+
+
+def _load_min_max_scaler(model_dir, name):
+    return MinMaxScaler(
+        np.load(model_dir / f"{name}_scaler_min.npy"),
+        np.load(model_dir / f"{name}_scaler_scale.npy"),
+    )
+
+
+def _load_standard_scaler(model_dir, name):
+    return StandardScaler(
+        np.load(model_dir / f"{name}_scaler_mean.npy"),
+        np.load(model_dir / f"{name}_scaler_var.npy"),
+        np.load(model_dir / f"{name}_scaler_scale.npy"),
+    )
 
 
 class SPSVS(object):
@@ -448,6 +636,8 @@ class SPSVS(object):
     Args:
         model_dir (str): directory of the model
         device (str): cpu or cuda
+        compile_backend (str): backend to compile the vocoder. ``jit`` or
+            ``inductor``. Disabled if None.
 
     Examples:
 
@@ -492,7 +682,7 @@ class SPSVS(object):
     >>> wav, sr = engine.svs(labels, post_filter_type="merlin", vocoder_type="world")
     """
 
-    def __init__(self, model_dir, device="cpu"):
+    def __init__(self, model_dir, device="cpu", compile_backend=None):
         self.device = device
 
         if isinstance(model_dir, str):
@@ -502,6 +692,26 @@ class SPSVS(object):
         assert model_dir / "config.yaml"
         self.config = OmegaConf.load(model_dir / "config.yaml")
         self.feature_type = self.config.get("feature_type", "world")
+        # NOTE: resolve config values once rather than on every synthesis call
+        self.sample_rate = self.config.sample_rate
+        self.frame_period = self.config.frame_period
+        self._timing_kwargs = {
+            "log_f0_conditioning": self.config.log_f0_conditioning,
+            "allowed_range": self.config.timelag.allowed_range,
+            "allowed_range_rest": self.config.timelag.allowed_range_rest,
+            "force_clip_input_features": self.config.timelag.force_clip_input_features,
+            "frame_period": self.frame_period,
+        }
+        self._synthesis_kwargs = {
+            "sample_rate": self.sample_rate,
+            "frame_period": self.frame_period,
+            "log_f0_conditioning": self.config.log_f0_conditioning,
+            "subphone_features": self.config.acoustic.subphone_features,
+            "use_world_codec": self.config.get("use_world_codec", False),
+            "force_clip_input_features": self.config.acoustic.force_clip_input_features,
+            "relative_f0": self.config.acoustic.relative_f0,
+            "feature_type": self.feature_type,
+        }
 
         # qst
         self.binary_dict, self.numeric_dict = hts.load_question_set(
@@ -512,83 +722,42 @@ class SPSVS(object):
         self.pitch_indices = get_pitch_indices(self.binary_dict, self.numeric_dict)
 
         # Time-lag model
-        self.timelag_config = OmegaConf.load(model_dir / "timelag_model.yaml")
-        self.timelag_model = instantiate(self.timelag_config.netG).to(device)
-        checkpoint = torch.load(
-            model_dir / "timelag_model.pth",
-            map_location=device,
-        )
-        self.timelag_model.load_state_dict(checkpoint["state_dict"])
-
-        self.timelag_in_scaler = MinMaxScaler(
-            np.load(model_dir / "in_timelag_scaler_min.npy"),
-            np.load(model_dir / "in_timelag_scaler_scale.npy"),
+        self.timelag_model, self.timelag_config = _load_model(
+            model_dir, "timelag", device
         )
-        self.timelag_out_scaler = StandardScaler(
-            np.load(model_dir / "out_timelag_scaler_mean.npy"),
-            np.load(model_dir / "out_timelag_scaler_var.npy"),
-            np.load(model_dir / "out_timelag_scaler_scale.npy"),
-        )
-        self.timelag_model.eval()
+        self.timelag_in_scaler = _load_min_max_scaler(model_dir, "in_timelag")
+        self.timelag_out_scaler = _load_standard_scaler(model_dir, "out_timelag")
 
         # Duration model
-        self.duration_config = OmegaConf.load(model_dir / "duration_model.yaml")
-        self.duration_model = instantiate(self.duration_config.netG).to(device)
-        checkpoint = torch.load(
-            model_dir / "duration_model.pth",
-            map_location=device,
+        self.duration_model, self.duration_config = _load_model(
+            model_dir, "duration", device
         )
-        self.duration_model.load_state_dict(checkpoint["state_dict"])
-
-        self.duration_in_scaler = MinMaxScaler(
-            np.load(model_dir / "in_duration_scaler_min.npy"),
-            np.load(model_dir / "in_duration_scaler_scale.npy"),
-        )
-        self.duration_out_scaler = StandardScaler(
-            np.load(model_dir / "out_duration_scaler_mean.npy"),
-            np.load(model_dir / "out_duration_scaler_var.npy"),
-            np.load(model_dir / "out_duration_scaler_scale.npy"),
-        )
-        self.duration_model.eval()
+        self.duration_in_scaler = _load_min_max_scaler(model_dir, "in_duration")
+        self.duration_out_scaler = _load_standard_scaler(model_dir, "out_duration")
 
         # Acoustic model
-        self.acoustic_config = OmegaConf.load(model_dir / "acoustic_model.yaml")
-        self.acoustic_model = instantiate(self.acoustic_config.netG).to(device)
-        checkpoint = torch.load(
-            model_dir / "acoustic_model.pth",
-            map_location=device,
-        )
-        self.acoustic_model.load_state_dict(checkpoint["state_dict"])
-        self.acoustic_in_scaler = MinMaxScaler(
-            np.load(model_dir / "in_acoustic_scaler_min.npy"),
-            np.load(model_dir / "in_acoustic_scaler_scale.npy"),
+        self.acoustic_model, self.acoustic_config = _load_model(
+            model_dir, "acoustic", device
         )
-        self.acoustic_out_scaler = StandardScaler(
-            np.load(model_dir / "out_acoustic_scaler_mean.npy"),
-            np.load(model_dir / "out_acoustic_scaler_var.npy"),
-            np.load(model_dir / "out_acoustic_scaler_scale.npy"),
+        self._static_stream_sizes = get_static_stream_sizes(
+            self.acoustic_config.stream_sizes,
+            self.acoustic_config.has_dynamic_features,
+            self.acoustic_config.num_windows,
         )
+        self.acoustic_in_scaler = _load_min_max_scaler(model_dir, "in_acoustic")
+        self.acoustic_out_scaler = _load_standard_scaler(model_dir, "out_acoustic")
         # NOTE: this is used for GV post-filtering
         self.acoustic_out_static_scaler = extract_static_scaler(
             self.acoustic_out_scaler, self.acoustic_config
         )
 
-        self.acoustic_model.eval()
-
         # Post-filter
         if (model_dir / "postfilter_model.yaml").exists():
-            self.postfilter_config = OmegaConf.load(model_dir / "postfilter_model.yaml")
-            self.postfilter_model = instantiate(self.postfilter_config.netG).to(device)
-            checkpoint = torch.load(
-                model_dir / "postfilter_model.pth",
-                map_location=device,
+            self.postfilter_model, self.postfilter_config = _load_model(
+                model_dir, "postfilter", device
             )
-            self.postfilter_model.load_state_dict(checkpoint["state_dict"])
-            self.postfilter_model.eval()
-            self.postfilter_out_scaler = StandardScaler(
-                np.load(model_dir / "out_postfilter_scaler_mean.npy"),
-                np.load(model_dir / "out_postfilter_scaler_var.npy"),
-                np.load(model_dir / "out_postfilter_scaler_scale.npy"),
+            self.postfilter_out_scaler = _load_standard_scaler(
+                model_dir, "out_postfilter"
             )
         else:
             self.postfilter_model = None
@@ -600,6 +769,7 @@ class SPSVS(object):
             if not _pwg_available:
                 warn("parallel_wavegan is not installed. Vocoder model is disabled.")
                 self.vocoder = None
+                self._vocoder_in_scaler = None
             else:
                 self.vocoder_config = OmegaConf.load(model_dir / "vocoder_model.yaml")
 
@@ -617,29 +787,34 @@ class SPSVS(object):
                     self.vocoder.remove_weight_norm()
                     self.vocoder = USFGANWrapper(self.vocoder_config, self.vocoder)
 
-                    # Extract scaler params for [mgc, bap]
                     mean_ = np.load(model_dir / "in_vocoder_scaler_mean.npy")
                     var_ = np.load(model_dir / "in_vocoder_scaler_var.npy")
                     scale_ = np.load(model_dir / "in_vocoder_scaler_scale.npy")
-                    stream_sizes = get_static_stream_sizes(
-                        self.acoustic_config.stream_sizes,
-                        self.acoustic_config.has_dynamic_features,
-                        self.acoustic_config.num_windows,
-                    )
-                    mgc_end_dim = stream_sizes[0]
-                    bap_start_dim = sum(stream_sizes[:3])
-                    bap_end_dim = sum(stream_sizes[:4])
-                    self.vocoder_in_scaler = StandardScaler(
-                        np.concatenate(
-                            [mean_[:mgc_end_dim], mean_[bap_start_dim:bap_end_dim]]
-                        ),
-                        np.concatenate(
-                            [var_[:mgc_end_dim], var_[bap_start_dim:bap_end_dim]]
-                        ),
-                        np.concatenate(
-                            [scale_[:mgc_end_dim], scale_[bap_start_dim:bap_end_dim]]
-                        ),
-                    )
+                    if self.vocoder_config.data.aux_feats == ["mcep", "codeap"]:
+                        # Extract scaler params for [mgc, bap]
+                        stream_sizes = self._static_stream_sizes
+                        mgc_end_dim = stream_sizes[0]
+                        bap_start_dim = sum(stream_sizes[:3])
+                        bap_end_dim = sum(stream_sizes[:4])
+                        self.vocoder_in_scaler = StandardScaler(
+                            np.concatenate(
+                                [mean_[:mgc_end_dim], mean_[bap_start_dim:bap_end_dim]]
+                            ),
+                            np.concatenate(
+                                [var_[:mgc_end_dim], var_[bap_start_dim:bap_end_dim]]
+                            ),
+                            np.concatenate(
+                                [
+                                    scale_[:mgc_end_dim],
+                                    scale_[bap_start_dim:bap_end_dim],
+                                ]
+                            ),
+                        )
+                    else:
+                        # Extract scaler params for mel
+                        self.vocoder_in_scaler = StandardScaler(
+                            mean_[:80], var_[:80], scale_[:80]
+                        )
                 else:
                     self.vocoder = load_model(
                         model_dir / "vocoder_model.pth", config=self.vocoder_config
@@ -651,10 +826,17 @@ class SPSVS(object):
                         np.load(model_dir / "in_vocoder_scaler_scale.npy"),
                     )
                 self.vocoder.eval()
+                if compile_backend is not None:
+                    self.vocoder = compile_vocoder(self.vocoder, compile_backend)
+                # NOTE: keep a device copy of the scaler to normalize on the device
+                self._vocoder_in_scaler = to_pytorch_standard_scaler(
+                    self.vocoder_in_scaler
+                ).to(device)
         else:
             self.vocoder = None
             self.vocoder_config = None
             self.vocoder_in_scaler = None
+            self._vocoder_in_scaler = None
 
     def __repr__(self):
         timelag_str = json.dumps(
@@ -720,6 +902,8 @@ Acoustic model: {acoustic_str}
         self.acoustic_model.to(device)
         self.postfilter_model.to(device) if self.postfilter_model is not None else None
         self.vocoder.to(device) if self.vocoder is not None else None
+        if self._vocoder_in_scaler is not None:
+            self._vocoder_in_scaler.to(device)
 
     def synthesis_from_timings(
         self,
@@ -766,7 +950,7 @@ Acoustic model: {acoustic_str}
             def tqdm(x, **kwargs):
                 return x
 
-        hts_frame_shift = int(self.config.frame_period * 1e4)
+        hts_frame_shift = int(self.frame_period * 1e4)
         wavs = []
         for seg_labels in tqdm(segmented_labels):
             seg_labels.frame_shift = hts_frame_shift
@@ -782,18 +966,11 @@ Acoustic model: {acoustic_str}
                 acoustic_out_static_scaler=self.acoustic_out_static_scaler,
                 vocoder=self.vocoder,
                 vocoder_config=self.vocoder_config,
-                vocoder_in_scaler=self.vocoder_in_scaler,
+                vocoder_in_scaler=self._vocoder_in_scaler,
                 postfilter_model=self.postfilter_model,
                 postfilter_config=self.postfilter_config,
                 postfilter_out_scaler=self.postfilter_out_scaler,
-                sample_rate=self.config.sample_rate,
-                frame_period=self.config.frame_period,
-                log_f0_conditioning=self.config.log_f0_conditioning,
-                subphone_features=self.config.acoustic.subphone_features,
-                use_world_codec=self.config.get("use_world_codec", False),
-                force_clip_input_features=self.config.acoustic.force_clip_input_features,
-                relative_f0=self.config.acoustic.relative_f0,
-                feature_type=self.feature_type,
+                static_stream_sizes=self._static_stream_sizes,
                 vocoder_type=vocoder_type,
                 post_filter_type=post_filter_type,
                 trajectory_smoothing=trajectory_smoothing,
@@ -804,20 +981,21 @@ Acoustic model: {acoustic_str}
                 post_f0_shift_in_cent=post_f0_shift_in_cent,
                 vibrato_scale=vibrato_scale,
                 force_fix_vuv=force_fix_vuv,
+                **self._synthesis_kwargs,
             )
             wavs.append(wav)
 
         # Concatenate segmented wavs
         wav = np.concatenate(wavs, axis=0).reshape(-1)
-        wav = post_process(wav, self.config.sample_rate)
+        wav = post_process(wav, self.sample_rate)
 
         if return_states:
             assert not segmented_synthesis
-            return wav, self.config.sample_rate, states
+            return wav, self.sample_rate, states
 
-        return wav, self.config.sample_rate
+        return wav, self.sample_rate
 
-    @torch.no_grad()
+    @inference_mode()
     def svs(
         self,
         labels,
@@ -890,11 +1068,7 @@ WORLD is only supported for waveform generation"""
             duration_config=self.duration_config,
             duration_in_scaler=self.duration_in_scaler,
             duration_out_scaler=self.duration_out_scaler,
-            log_f0_conditioning=self.config.log_f0_conditioning,
-            allowed_range=self.config.timelag.allowed_range,
-            allowed_range_rest=self.config.timelag.allowed_range_rest,
-            force_clip_input_features=self.config.timelag.force_clip_input_features,
-            frame_period=self.config.frame_period,
+            **self._timing_kwargs,
         )
 
         return self.synthesis_from_timings(
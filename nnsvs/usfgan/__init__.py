@@ -14,7 +14,7 @@ class USFGANWrapper(nn.Module):
         """Inference for USFGAN
 
         Args:
-            f0 (numpy.ndarray): F0 (T, 1)
+            f0 (numpy.ndarray or Tensor): F0 (T, 1)
             aux_feats (Tensor): Auxiliary features (T, C)
 
         """
@@ -28,18 +28,20 @@ class USFGANWrapper(nn.Module):
         pad_fn = nn.ReplicationPad1d(self.config.generator.aux_context_window)
         assert self.config.data.sine_f0_type in ["contf0", "f0"]
         assert self.config.data.df_f0_type in ["contf0", "f0"]
+        device = aux_feats.device
+
+        # NOTE: the dilated factors are computed on the device
+        if isinstance(f0, np.ndarray):
+            f0 = torch.from_numpy(f0)
+        f0 = f0.to(device=device, dtype=torch.float32).view(1, 1, -1)
         df = dilated_factor(
-            np.squeeze(f0.copy()),
+            f0.view(-1),
             self.config.data.sample_rate,
             self.config.data.dense_factor,
         )
-        df = df.repeat(self.config.data.hop_size, axis=0)
-
-        device = aux_feats.device
+        df = df.repeat_interleave(self.config.data.hop_size).view(1, 1, -1)
 
         c = pad_fn(aux_feats.unsqueeze(0).transpose(2, 1)).to(device)
-        df = torch.FloatTensor(df).view(1, 1, -1).to(device)
-        f0 = torch.FloatTensor(f0).unsqueeze(0).transpose(2, 1).to(device)
 
         in_signal = signal_generator(f0)
         y = self.generator(in_signal, c, df)[0]
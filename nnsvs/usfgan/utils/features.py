@@ -57,15 +57,20 @@ def dilated_factor(batch_f0, fs, dense_factor):
     """Pitch-dependent dilated factor
 
     Args:
-        batch_f0 (ndarray): the f0 sequence (T)
+        batch_f0 (ndarray or Tensor): the f0 sequence (T)
         fs (int): sampling rate
         dense_factor (int): the number of taps in one cycle
 
     Return:
-        dilated_factors(np array):
+        dilated_factors(np array or Tensor):
             float array of the pitch-dependent dilated factors (T)
 
     """
+    if torch.is_tensor(batch_f0):
+        # NOTE: computed on the device of the input without modifying it in-place
+        batch_f0 = batch_f0.masked_fill(batch_f0 == 0, fs / dense_factor)
+        return fs / batch_f0 / dense_factor
+
     batch_f0[batch_f0 == 0] = fs / dense_factor
     dilated_factors = np.ones(batch_f0.shape) * fs
     dilated_factors /= batch_f0
@@ -134,6 +134,20 @@ def init_seed(seed):
         torch.cuda.manual_seed_all(seed)
 
 
+def inference_mode():
+    """Context manager and decorator for inference
+
+    ``torch.inference_mode`` is used if available (PyTorch 1.9 or later).
+    Otherwise, falls back to ``torch.no_grad``.
+
+    Returns:
+        context manager for inference
+    """
+    if hasattr(torch, "inference_mode"):
+        return torch.inference_mode()
+    return torch.no_grad()
+
+
 def dynamic_import(name: str) -> Any:
     """Dynamic import
 
@@ -272,6 +286,23 @@ class StandardScaler:
         return x * self.scale_ + self.mean_
 
 
+def to_pytorch_standard_scaler(scaler):
+    """Convert a NumPy standard scaler to a PyTorch module
+
+    Args:
+        scaler (StandardScaler): NumPy standard scaler
+
+    Returns:
+        PyTorchStandardScaler: scaler that runs as tensor ops (fp32)
+    """
+    if isinstance(scaler, PyTorchStandardScaler):
+        return scaler
+    return PyTorchStandardScaler(
+        torch.from_numpy(np.asarray(scaler.mean_)).float(),
+        torch.from_numpy(np.asarray(scaler.scale_)).float(),
+    )
+
+
 class MinMaxScaler:
     """sklearn.preprocess.MinMaxScaler like class with only
     transform functionality
@@ -296,3 +327,64 @@ class MinMaxScaler:
 
     def inverse_transform(self, x):
         return (x - self.min_) / self.scale_
+
+
+class PinnedBuffer:
+    """Reusable page-locked host buffer for host-to-device transfers
+
+    The host buffer and its device counterpart are allocated lazily and grow
+    on demand. Copies to the device are issued asynchronously; before the buffer
+    is overwritten, the previous copy is waited for.
+
+    .. note::
+        The returned tensor is a view of the device buffer and is overwritten by
+        the next call. Consume it (e.g., normalize it into a new tensor) first.
+
+    Args:
+        dtype (torch.dtype): dtype of the buffer
+    """
+
+    def __init__(self, dtype=torch.float32):
+        self.dtype = dtype
+        self._buffer = None
+        self._device_buffer = None
+        self._device = None
+        self._event = None
+
+    def to(self, x, device):
+        """Copy an array to the device through the pinned buffer
+
+        Args:
+            x (np.ndarray): input array (T, C)
+            device (torch.device): target device
+
+        Returns:
+            torch.Tensor: tensor on the device
+        """
+        if self._event is not None:
+            self._event.synchronize()
+        if (
+            self._buffer is None
+            or len(x) > self._buffer.shape[0]
+            or x.shape[1:] != self._buffer.shape[1:]
+        ):
+            # NOTE: grow geometrically to avoid re-allocation for increasing lengths
+            size = len(x)
+            if self._buffer is not None and x.shape[1:] == self._buffer.shape[1:]:
+                size = max(size, 2 * self._buffer.shape[0])
+            self._buffer = torch.empty(
+                size, *x.shape[1:], dtype=self.dtype, pin_memory=True
+            )
+            self._device_buffer = None
+        if self._device_buffer is None or self._device != device:
+            self._device_buffer = torch.empty_like(self._buffer, device=device)
+            self._device = device
+        staging = self._buffer[: len(x)]
+        np.copyto(staging.numpy(), x)
+        y = self._device_buffer[: len(x)]
+        y.copy_(staging, non_blocking=True)
+        # NOTE: the copy is issued on the stream of the target device, which may not
+        # be the current device
+        self._event = torch.cuda.Event()
+        self._event.record(torch.cuda.current_stream(device))
+        return y
@@ -30,6 +30,7 @@ setup(
         "hydra-core >= 1.1.0, < 1.2.0",
         "hydra_colorlog >= 1.1.0",
         "librosa >= 0.7.0",
+        "numba",
         "pysptk",
         "pyworld",
         "tensorboard",
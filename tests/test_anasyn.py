@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import torch
+from omegaconf import OmegaConf
+from torch import nn
+
+pytest.importorskip("parallel_wavegan")
+
+from nnsvs.bin.anasyn import (  # noqa: E402
+    batch_inference,
+    gen_vocoder_input,
+    make_batches,
+)
+
+
+class _DummyGenerator(nn.Module):
+    def __init__(self, upsample_factor):
+        super().__init__()
+        self.upsample_factor = upsample_factor
+        self.conv = nn.Conv1d(4, 1, 1)
+
+    def forward(self, c):
+        c = torch.repeat_interleave(self.conv(c), self.upsample_factor, dim=-1)
+        return torch.tanh(c)
+
+
+class _DummyPWGGenerator(_DummyGenerator):
+    aux_context_window = 2
+
+    def __init__(self, upsample_factor):
+        super().__init__(upsample_factor)
+        self.conv = nn.Conv1d(4, 1, 2 * self.aux_context_window + 1)
+
+    def forward(self, x, c):
+        # NOTE: ignore the noise so that outputs are deterministic
+        return super().forward(c) + 0 * x
+
+
+@pytest.mark.parametrize("generator", [_DummyGenerator, _DummyPWGGenerator])
+def test_batch_inference(generator):
+    upsample_factor = 4
+    vocoder = generator(upsample_factor).eval()
+    voc_inps = [torch.randn(T, 4) for T in [7, 3, 10]]
+
+    wavs = batch_inference(vocoder, voc_inps)
+    assert len(wavs) == len(voc_inps)
+    for voc_inp, wav in zip(voc_inps, wavs):
+        assert wav.dtype == np.float32
+        assert wav.shape == (len(voc_inp) * upsample_factor,)
+        # Per-utterance inference
+        wav_ref = batch_inference(vocoder, [voc_inp])[0]
+        assert np.allclose(wav, wav_ref, atol=1e-6)
+
+
+@pytest.mark.parametrize("feature_type", ["world", "melf0"])
+def test_gen_vocoder_input(feature_type):
+    if feature_type == "world":
+        static_stream_sizes = [60, 1, 1, 5]
+        acoustic_config = OmegaConf.create(
+            {
+                "stream_sizes": [180, 3, 1, 15],
+                "has_dynamic_features": [True, True, False, True],
+                "num_windows": 3,
+            }
+        )
+    else:
+        static_stream_sizes = [80, 1, 1]
+        acoustic_config = None
+    vuv_idx = sum(static_stream_sizes[:2])
+    acoustic_features = np.random.rand(20, sum(static_stream_sizes)).astype(np.float32)
+
+    voc_inp = gen_vocoder_input(
+        acoustic_features,
+        acoustic_config,
+        vuv_threshold=0.5,
+        feature_type=feature_type,
+        static_stream_sizes=None if feature_type == "world" else static_stream_sizes,
+    )
+    assert voc_inp.shape == acoustic_features.shape
+    vuv = acoustic_features[:, vuv_idx] > 0.5
+    assert np.array_equal(voc_inp[:, vuv_idx], vuv.astype(np.float32))
+    assert np.array_equal(
+        np.delete(voc_inp, vuv_idx, -1), np.delete(acoustic_features, vuv_idx, -1)
+    )
+
+
+def test_make_batches():
+    lengths = [5, 3, 9, 3, 7]
+    assert make_batches(lengths, 1) == [[1], [3], [0], [4], [2]]
+    assert make_batches(lengths, 2) == [[1, 3], [0, 4], [2]]
+    assert make_batches(lengths, 8) == [[1, 3, 0, 4, 2]]
@@ -1,6 +1,14 @@
 import numpy as np
 import pytest
-from nnsvs.dsp import lowpass_filter
+from nnsvs.dsp import (
+    bandpass_filter,
+    binarize_vuv,
+    fill_and_clip_aperiodicity,
+    lowpass_filter,
+    peak_amplitude,
+    scale_to_int16,
+)
+from scipy import signal
 
 
 @pytest.mark.parametrize("cutoff", [3, 5, 8])
@@ -11,3 +19,40 @@ def test_lowpass_filter_noraise(cutoff):
     lowpass_filter(np.zeros(10)[0:0], sr, cutoff=cutoff)
     for n in range(sr * 2):
         lowpass_filter(np.random.rand(n), sr, cutoff=cutoff)
+
+
+@pytest.mark.parametrize("scale", [1.0, 100.0, 32767.0])
+def test_scale_to_int16(scale):
+    x = np.random.uniform(-1, 1, 1000)
+    assert np.array_equal(scale_to_int16(x, scale), (x * scale).astype(np.int16))
+
+
+def test_peak_amplitude():
+    x = np.random.uniform(-2, 1, 1000)
+    assert peak_amplitude(x) == (np.max(x), np.abs(x).max())
+
+
+@pytest.mark.parametrize("sr", [24000, 48000])
+def test_bandpass_filter(sr):
+    x = np.random.randn(sr)
+    b, a = signal.butter(5, [70 / (sr // 2), 0.999], "bandpass")
+    assert np.allclose(bandpass_filter(x, sr), signal.filtfilt(b, a, x), atol=1e-4)
+
+
+def test_binarize_vuv():
+    feats = np.random.rand(100, 3).astype(np.float32)
+    vuv = feats[:, 1:2]
+    out = np.zeros((100, 2), dtype=np.float32)
+    binarize_vuv(vuv, 0.5, out[:, 1:2])
+    assert np.array_equal(out[:, 1:2], (vuv > 0.5).astype(np.float32))
+    assert np.all(out[:, 0] == 0)
+
+
+def test_fill_and_clip_aperiodicity():
+    aperiodicity = np.random.uniform(-0.5, 1.5, (100, 5))
+    vuv = np.random.rand(100, 1)
+
+    ref = aperiodicity.copy()
+    ref[vuv.reshape(-1) < 0.5, 0] = 1.0
+    ref = np.clip(ref, 0.0, 1.0)
+    assert np.array_equal(fill_and_clip_aperiodicity(aperiodicity, vuv, 0.5), ref)
@@ -1,10 +1,50 @@
 import numpy as np
 import pysinsy
 import pytest
+import torch
 from nnmnkwii.io import hts
+from nnsvs.dsp import bandpass_filter
 from nnsvs.pretrained import retrieve_pretrained_model
-from nnsvs.svs import SPSVS
+from nnsvs.svs import (
+    SPSVS,
+    CUDAGraphVocoder,
+    _load_state_dict,
+    compile_vocoder,
+    post_process,
+)
 from nnsvs.util import example_xml_file
+from torch import nn
+
+
+class _DummyGenerator(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv1d(4, 1, 3, padding=1)
+
+    def forward(self, c):
+        return torch.tanh(self.conv(c))
+
+    def inference(self, c):
+        return self.forward(c.transpose(1, 0).unsqueeze(0)).squeeze(0).transpose(1, 0)
+
+
+class _DummyPWGGenerator(nn.Module):
+    aux_context_window = 2
+    upsample_factor = 4
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv1d(4, 1, 2 * self.aux_context_window + 1)
+
+    def forward(self, x, c):
+        c = torch.repeat_interleave(self.conv(c), self.upsample_factor, dim=-1)
+        return torch.tanh(c) + 0.1 * x
+
+    def inference(self, c):
+        # NOTE: draw the noise on the CPU like ParallelWaveGANGenerator
+        x = torch.randn(1, 1, len(c) * self.upsample_factor).to(c.device)
+        c = nn.ReplicationPad1d(self.aux_context_window)(c.transpose(1, 0).unsqueeze(0))
+        return self.forward(x, c).squeeze(0).transpose(1, 0)
 
 
 @pytest.mark.parametrize("segmented_synthesis", [False, True])
@@ -25,3 +65,99 @@ def test_svs(segmented_synthesis, post_filter_type, vocoder_type):
     )
     assert sr == 48000
     assert np.isfinite(wav).all()
+
+
+def test_compile_vocoder():
+    vocoder = _DummyGenerator().eval()
+    c = torch.randn(10, 4)
+    with torch.no_grad():
+        y = vocoder.inference(c)
+        y_hat = compile_vocoder(vocoder, backend="jit").inference(c)
+    assert torch.allclose(y, y_hat)
+
+    with pytest.raises(ValueError):
+        compile_vocoder(vocoder, backend="unknown")
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA is not available")
+def test_cuda_graph_vocoder():
+    vocoder = _DummyGenerator().cuda().eval()
+    graph_vocoder = CUDAGraphVocoder(vocoder, bucket_size=8)
+    with torch.no_grad():
+        for T in [5, 8, 7, 20]:
+            c = torch.randn(T, 4, device="cuda")
+            y = vocoder.inference(c)
+            y_hat = graph_vocoder.inference(c)
+            assert y_hat.shape == y.shape
+            # NOTE: the last frame depends on the padding
+            assert torch.allclose(y[:-1], y_hat[:-1], atol=1e-5)
+    assert len(graph_vocoder._graphs) == 2
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA is not available")
+def test_cuda_graph_vocoder_noise():
+    vocoder = _DummyPWGGenerator().cuda().eval()
+    graph_vocoder = CUDAGraphVocoder(vocoder, bucket_size=8)
+    with torch.no_grad():
+        for T in [5, 8, 7, 20]:
+            c = torch.randn(T, 4, device="cuda")
+            c_pad = nn.ReplicationPad1d(vocoder.aux_context_window)(c.T[None])
+            y = vocoder(x=0, c=c_pad).squeeze(0).transpose(1, 0)
+            y_hat = graph_vocoder.inference(c)
+            assert y_hat.shape == (T * vocoder.upsample_factor, 1)
+            # NOTE: the noise must be drawn on every replay
+            assert not torch.allclose(y_hat, graph_vocoder.inference(c))
+            assert 0.02 < (y_hat - y).std() < 0.3
+    assert len(graph_vocoder._graphs) == 2
+
+    # The static buffers must not be reused by tensors allocated between replays
+    with torch.no_grad():
+        c = torch.randn(20, 4, device="cuda")
+        c_pad = nn.ReplicationPad1d(vocoder.aux_context_window)(c.T[None])
+        y = vocoder(x=0, c=c_pad).squeeze(0).transpose(1, 0)
+        for _ in range(3):
+            others = [
+                torch.full((1, 1, L * vocoder.upsample_factor), 1000.0, device="cuda")
+                for L in [8, 24]
+            ]
+            y_hat = graph_vocoder.inference(c)
+            assert 0.02 < (y_hat - y).std() < 0.3
+            assert all(bool((other == 1000.0).all()) for other in others)
+
+
+@pytest.mark.parametrize("amplitude", [0.5, 2.0, 1000.0, 50000.0])
+def test_post_process(amplitude):
+    sr = 24000
+    wav = np.random.uniform(-amplitude, amplitude, sr)
+
+    # Reference implementation
+    wav_ref = bandpass_filter(wav, sr)
+    if np.max(wav_ref) > 10:
+        if np.abs(wav_ref).max() > 32767:
+            wav_ref = wav_ref / np.abs(wav_ref).max()
+        wav_ref = wav_ref.astype(np.int16)
+    else:
+        if np.abs(wav_ref).max() > 1.0:
+            wav_ref = wav_ref / np.abs(wav_ref).max()
+        wav_ref = (wav_ref * 32767.0).astype(np.int16)
+
+    wav_hat = post_process(wav, sr)
+    assert wav_hat.dtype == np.int16
+    # Allow off-by-one errors due to floating point rounding
+    assert np.abs(wav_hat.astype(np.int32) - wav_ref).max() <= 1
+
+
+@pytest.mark.parametrize("use_new_zipfile_serialization", [False, True])
+def test_load_state_dict(tmp_path, use_new_zipfile_serialization):
+    model = _DummyGenerator()
+    path = tmp_path / "model.pth"
+    torch.save(
+        {"state_dict": model.state_dict()},
+        path,
+        _use_new_zipfile_serialization=use_new_zipfile_serialization,
+    )
+
+    model_hat = _DummyGenerator()
+    _load_state_dict(model_hat, path)
+    for p, p_hat in zip(model.parameters(), model_hat.parameters()):
+        assert torch.equal(p, p_hat)
@@ -1,4 +1,12 @@
-from nnsvs.util import get_world_stream_info
+import numpy as np
+import pytest
+import torch
+from nnsvs.util import (
+    PinnedBuffer,
+    StandardScaler,
+    get_world_stream_info,
+    to_pytorch_standard_scaler,
+)
 
 
 def test_get_world_stream_info():
@@ -15,3 +23,37 @@ def test_get_world_stream_info():
 
     assert get_world_stream_info(44100, 59, 1, vibrato_mode="none") == [60, 1, 1, 5]
     assert get_world_stream_info(48000, 59, 1, vibrato_mode="none") == [60, 1, 1, 5]
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA is not available")
+def test_pinned_buffer():
+    buf = PinnedBuffer()
+    for shape in [(10, 3), (20, 3), (5, 3), (8, 2)]:
+        x = np.random.rand(*shape)
+        y = buf.to(x, torch.device("cuda"))
+        assert y.shape == shape
+        assert np.allclose(y.cpu().numpy(), x, atol=1e-6)
+
+
+@pytest.mark.skipif(torch.cuda.device_count() < 2, reason="Multiple GPUs required")
+def test_pinned_buffer_non_default_device():
+    buf = PinnedBuffer()
+    device = torch.device("cuda:1")
+    xs = [np.random.rand(1000, 80) for _ in range(10)]
+    # NOTE: consume each output on the target device before the next copy
+    ys = [buf.to(x, device).clone() for x in xs]
+    for x, y in zip(xs, ys):
+        assert y.device == device
+        assert np.allclose(y.cpu().numpy(), x, atol=1e-6)
+
+
+def test_to_pytorch_standard_scaler():
+    D = 4
+    scaler = StandardScaler(np.random.rand(D), np.random.rand(D), np.random.rand(D) + 1)
+    torch_scaler = to_pytorch_standard_scaler(scaler)
+    assert to_pytorch_standard_scaler(torch_scaler) is torch_scaler
+
+    x = np.random.rand(10, D).astype(np.float32)
+    y = torch_scaler.transform(torch.from_numpy(x))
+    assert y.dtype == torch.float32
+    assert np.allclose(y.numpy(), scaler.transform(x), atol=1e-5)